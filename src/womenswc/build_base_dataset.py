@@ -1,35 +1,63 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
 import json
-import pandas as pd
-import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
 if TYPE_CHECKING:
     from pathlib import Path
-    from collections.abc import Callable
 
 from womenswc import (
     DATA_DIRECTORY,
     HISTORICAL_DATA,
 )
 from womenswc.match_data_util import (
+    innings_scorecards,
+    read_match,
+    sorted_teams,
     toss,
     get_scores,
     results,
 )
 
+# Base dataset schema
+BASE_SCHEMA = pa.schema(
+    [
+        ("match_id", pa.string()),
+        ("country", pa.string()),
+        ("start_date", pa.timestamp("ms")),
+        ("event", pa.string()),
+        ("team_0", pa.string()),
+        ("team_1", pa.string()),
+        ("toss_winner", pa.int8()),
+        ("toss_decision", pa.int8()),
+        ("runs_0", pa.int32()),
+        ("wickets_0", pa.int32()),
+        ("deliveries_0", pa.int32()),
+        ("runs_1", pa.int32()),
+        ("wickets_1", pa.int32()),
+        ("deliveries_1", pa.int32()),
+        ("result", pa.int8()),
+    ]
+)
+
 
 # Parse Match Data
 def matchdict(
-    match_data: dict, match_id: str, city_to_country: dict
+    match_data: dict,
+    match_id: str,
+    city_to_country: dict,
+    scorecards: list[dict] | None = None,
 ) -> dict[str, int | str | None]:
-    teams = match_data["info"]["teams"]
-    teams.sort()
-    if "winner" not in match_data["info"]["outcome"].keys():
+    teams = sorted_teams(match_data)
+    if match_data["info"]["outcome"].get("winner") is None:
         return {"match_id": match_id, "result": match_data["info"]["outcome"]["result"]}
-    toss_data = toss(match_data)
-    scores = get_scores(match_data)
+    toss_data = toss(match_data, teams)
+    scores = get_scores(match_data, toss_data, scorecards)
     return {
         "match_id": match_id,
         "country": city_to_country[match_data["info"]["city"]],
@@ -45,42 +73,82 @@ def matchdict(
         "runs_1": scores[1]["runs"],
         "wickets_1": scores[1]["wickets"],
         "deliveries_1": 6 * scores[1]["overs"][0] + scores[1]["overs"][1],
-        "result": results(match_data),
+        "result": results(match_data, teams),
     }
 
 
 # Read match data from JSON
+# Match info is small, so it is converted to a dict. Innings are aggregated in Arrow.
 def get_match_data_(
     match_json: Path, city_to_country: dict
 ) -> dict[str, int | str | None]:
     match_id = match_json.name.removesuffix(".json")
-    with open(match_json, "r") as fp:
-        return matchdict(json.load(fp), match_id, city_to_country)
+    match_table = read_match(match_json)
+    match_data = {"info": match_table.column("info")[0].as_py()}
+    return matchdict(
+        match_data, match_id, city_to_country, innings_scorecards(match_table)
+    )
 
 
 # Build Dataset
+# Match files are parsed in parallel, one worker process per CPU core.
+# Records are collected into typed columns, skipping matches with missing values
+# (no result, unknown toss decision).
 def build_db(
-    get_match_data_vec: Callable,
     city_to_country,
     historial_datadir: Path = HISTORICAL_DATA,
-):
+) -> pa.Table:
     json_files = list(historial_datadir.glob("*.json"))
-    return pd.DataFrame.from_records(
-        get_match_data_vec(json_files, city_to_country)
-    ).dropna()
+    columns: dict[str, list] = {name: [] for name in BASE_SCHEMA.names}
+    with ProcessPoolExecutor() as ex:
+        for record in ex.map(
+            partial(get_match_data_, city_to_country=city_to_country),
+            json_files,
+            chunksize=32,
+        ):
+            if all(record.get(name) is not None for name in columns):
+                for name, values in columns.items():
+                    values.append(record[name])
+    return pa.Table.from_pydict(columns).cast(BASE_SCHEMA)
 
 
 def main():
     with open(DATA_DIRECTORY / "city-to-country.json", "r") as fp:
         city_to_country = json.load(fp)
-    get_match_data_vec = np.vectorize(get_match_data_, otypes=[dict])
-    base_df = build_db(get_match_data_vec, city_to_country)
-    base_df["start_date"] = pd.to_datetime(base_df.start_date)
-    base_df = base_df.sort_values(by=["start_date"])
-    base_df = base_df[base_df.start_date.dt.year >= 2022]
-    base_df = base_df.reset_index()
-    base_df = base_df.drop(columns=["index"])
-    base_df.to_parquet(DATA_DIRECTORY / "processed" / "base_dataset.parquet")
+    base_table = build_db(city_to_country)
+    base_table = base_table.sort_by("start_date")
+    base_table = base_table.filter(
+        pc.greater_equal(pc.year(base_table["start_date"]), 2022)
+    )
+    # Repeated string columns are stored dictionary-encoded.
+    # Team and country columns share a dictionary so they can be compared directly.
+    team_dictionary = pc.unique(
+        pa.chunked_array(
+            base_table[column].combine_chunks()
+            for column in ["country", "team_0", "team_1"]
+        )
+    ).sort()
+    for column in ["country", "team_0", "team_1"]:
+        base_table = base_table.set_column(
+            base_table.schema.get_field_index(column),
+            column,
+            pa.DictionaryArray.from_arrays(
+                pc.index_in(base_table[column], value_set=team_dictionary)
+                .combine_chunks()
+                .cast(pa.int32()),
+                team_dictionary,
+            ),
+        )
+    base_table = base_table.set_column(
+        base_table.schema.get_field_index("event"),
+        "event",
+        pc.dictionary_encode(base_table["event"]),
+    )
+    pq.write_table(
+        base_table,
+        DATA_DIRECTORY / "processed" / "base_dataset.parquet",
+        compression="zstd",
+    )
 
 
 if __name__ == "__main__":
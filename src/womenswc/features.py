@@ -1,17 +1,18 @@
 from __future__ import annotations
-from typing import Literal, TYPE_CHECKING
+from typing import Literal
 import json
+import numpy as np
 import pandas as pd
 from womenswc import DATA_DIRECTORY
 from womenswc.weights_util import (
+    BASE_COLUMNS,
+    base_arrays,
     expweights_list,
+    indexer,
     weighted_agg_stats,
     drop_zeros_in_denominator,
 )
 
-if TYPE_CHECKING:
-    import numpy as np
-
 # Features
 # -------------------------------------------------------------------
 
@@ -19,16 +20,17 @@ if TYPE_CHECKING:
 # -------------------------------------------------------------------
 
 
-def home_advantage(base_df: pd.DataFrame, n: Literal[0, 1]) -> pd.Series:
+def home_advantage(base_df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
     """
-    Home Advantage for team_n.
+    Home Advantage for team_0 and team_1.
 
     Equals 1 if team_n is home team, -1 if away team, and 0 if neutral.
+    Both are computed together since home_adv_1 = -home_adv_0.
     """
-    m = int(not n)
-    return (base_df[f"team_{n}"] == base_df["country"]).astype(int) - (
-        base_df[f"team_{m}"] == base_df["country"]
-    ).astype(int)
+    is_home_0 = np.asarray(base_df.team_0.values == base_df.country.values, np.int8)
+    is_home_1 = np.asarray(base_df.team_1.values == base_df.country.values, np.int8)
+    home_adv_0 = is_home_0 - is_home_1
+    return home_adv_0, -home_adv_0
 
 
 # Weighted Features
@@ -36,8 +38,8 @@ def home_advantage(base_df: pd.DataFrame, n: Literal[0, 1]) -> pd.Series:
 # Win Percentage
 # -------------------------------------------------------------------
 def win_percentage(
-    weighted_stats, n: Literal[0, 1], filter_zeros: pd.Series
-) -> pd.Series:
+    weighted_stats, n: Literal[0, 1], filter_zeros: np.ndarray
+) -> np.ndarray:
     """
     Weighted Win Percentage of team_n.
 
@@ -52,8 +54,8 @@ def win_percentage(
 # Batting Average
 # -------------------------------------------------------------------
 def batting_average(
-    weighted_stats, n: Literal[0, 1], filter_zeros: pd.Series
-) -> pd.Series:
+    weighted_stats, n: Literal[0, 1], filter_zeros: np.ndarray
+) -> np.ndarray:
     """
     Weighted Batting Average of team_n.
 
@@ -69,8 +71,8 @@ def batting_average(
 # Batting Strike-rate
 # -------------------------------------------------------------------
 def batting_strike_rate(
-    weighted_stats, n: Literal[0, 1], filter_zeros: pd.Series
-) -> pd.Series:
+    weighted_stats, n: Literal[0, 1], filter_zeros: np.ndarray
+) -> np.ndarray:
     """
     Weighted Batting Strike-rate of team_n.
 
@@ -87,8 +89,8 @@ def batting_strike_rate(
 # Bowling Average
 # -------------------------------------------------------------------
 def bowling_average(
-    weighted_stats, n: Literal[0, 1], filter_zeros: pd.Series
-) -> pd.Series:
+    weighted_stats, n: Literal[0, 1], filter_zeros: np.ndarray
+) -> np.ndarray:
     """
     Weighted Bowling Average of team_n.
 
@@ -104,8 +106,8 @@ def bowling_average(
 # Bowling Economy
 # -------------------------------------------------------------------
 def bowling_economy(
-    weighted_stats, n: Literal[0, 1], filter_zeros: pd.Series
-) -> pd.Series:
+    weighted_stats, n: Literal[0, 1], filter_zeros: np.ndarray
+) -> np.ndarray:
     """
     Weighted Bowling Economy of team_n.
 
@@ -120,37 +122,60 @@ def bowling_economy(
 
 
 def build_features(
-    base_df: pd.DataFrame, teams: list[str], weight: pd.Series | np.ndarray
+    base_df: pd.DataFrame, teams: list[str], weight: np.ndarray
 ) -> pd.DataFrame:
-    # Mask
-    is_team_0 = {team: (base_df.team_0 == team) for team in teams}
-    is_team_1 = {team: (base_df.team_1 == team) for team in teams}
+    arrays = base_arrays(base_df)
+    # Match and team indices for team_0 and team_1
+    indexer_0 = indexer(arrays, teams, 0)
+    indexer_1 = indexer(arrays, teams, 1)
     # Weighted Aggregate Stats
-    weighted_stats = weighted_agg_stats(base_df, weight, teams, is_team_0, is_team_1)
+    weighted_stats = weighted_agg_stats(arrays, weight, teams, indexer_0, indexer_1)
     # Filter out rows with zero in any column that is used to divide another column
-    filter_zeros = drop_zeros_in_denominator(
-        base_df, weight, teams, is_team_0, is_team_1
-    )
-    df: pd.DataFrame
-    df = base_df[["team_0", "team_1"]][filter_zeros].copy()
+    filter_zeros = drop_zeros_in_denominator(weighted_stats)
+    # Weighted features are stacked into a single float32 array and rounded once.
+    weighted_features = {
+        "win_percentage": win_percentage,
+        "batting_average": batting_average,
+        "batting_sr": batting_strike_rate,
+        "bowling_average": bowling_average,
+        "bowling_economy": bowling_economy,
+    }
+    out = np.stack(
+        [
+            feature(weighted_stats, n, filter_zeros)
+            for n in [0, 1]
+            for feature in weighted_features.values()
+        ],
+        axis=1,
+    ).astype(np.float32)
+    np.round(out, 2, out=out)
+    home_adv = home_advantage(base_df)
+    columns = {
+        "team_0": base_df.team_0.array[filter_zeros],
+        "team_1": base_df.team_1.array[filter_zeros],
+    }
     for n in [0, 1]:
-        df[f"home_adv_{n}"] = home_advantage(base_df, n)[filter_zeros]
-        df[f"win_percentage_{n}"] = win_percentage(weighted_stats, n, filter_zeros)
-        df[f"batting_average_{n}"] = batting_average(weighted_stats, n, filter_zeros)
-        df[f"batting_sr_{n}"] = batting_strike_rate(weighted_stats, n, filter_zeros)
-        df[f"bowling_average_{n}"] = bowling_average(weighted_stats, n, filter_zeros)
-        df[f"bowling_economy_{n}"] = bowling_economy(weighted_stats, n, filter_zeros)
-    df = df.round(decimals=2)
+        columns[f"home_adv_{n}"] = home_adv[n][filter_zeros]
+        for i, name in enumerate(weighted_features):
+            columns[f"{name}_{n}"] = out[:, n * len(weighted_features) + i]
+    df = pd.DataFrame(columns, index=base_df.index[filter_zeros])
     return df
 
 
 def main():
-    base_df = pd.read_parquet(DATA_DIRECTORY / "processed" / "base_dataset.parquet")
+    # Only read the columns used to build features
+    base_df = pd.read_parquet(
+        DATA_DIRECTORY / "processed" / "base_dataset.parquet",
+        columns=["country", "start_date", *BASE_COLUMNS],
+        engine="pyarrow",
+    )
     with open(DATA_DIRECTORY / "teams_list.json") as fp:
         teams = json.load(fp)
     weight = expweights_list(base_df, half_life=180)
     df = build_features(base_df, teams, weight)
-    df.to_parquet(DATA_DIRECTORY / "processed" / "features_dataset.parquet")
+    df.to_parquet(
+        DATA_DIRECTORY / "processed" / "features_dataset.parquet", engine="pyarrow"
+    )
     print(
         "Features dataset created and saved to "
         f"{DATA_DIRECTORY / 'processed' / 'features_dataset.parquet'}"
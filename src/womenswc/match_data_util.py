@@ -1,12 +1,50 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
 import json
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.json as pj
 
 if TYPE_CHECKING:
     from collections.abc import Iterable
     from pathlib import Path
 
 
+# Fields of the match JSON used to build the base dataset.
+# All other fields are skipped by the Arrow JSON reader.
+DELIVERY_TYPE = pa.struct(
+    [
+        ("runs", pa.struct([("extras", pa.int64()), ("total", pa.int64())])),
+        ("wickets", pa.list_(pa.struct([("kind", pa.string())]))),
+    ]
+)
+OVER_TYPE = pa.struct([("over", pa.int64()), ("deliveries", pa.list_(DELIVERY_TYPE))])
+INNINGS_TYPE = pa.struct([("team", pa.string()), ("overs", pa.list_(OVER_TYPE))])
+INFO_TYPE = pa.struct(
+    [
+        ("city", pa.string()),
+        ("dates", pa.list_(pa.string())),
+        ("event", pa.struct([("name", pa.string())])),
+        ("outcome", pa.struct([("winner", pa.string()), ("result", pa.string())])),
+        ("teams", pa.list_(pa.string())),
+        ("toss", pa.struct([("winner", pa.string()), ("decision", pa.string())])),
+    ]
+)
+MATCH_SCHEMA = pa.schema([("info", INFO_TYPE), ("innings", pa.list_(INNINGS_TYPE))])
+
+
+# Read match JSON file into a single row Arrow table with MATCH_SCHEMA
+def read_match(match_json: str | Path) -> pa.Table:
+    return pj.read_json(
+        match_json,
+        parse_options=pj.ParseOptions(
+            explicit_schema=MATCH_SCHEMA,
+            unexpected_field_behavior="ignore",
+            newlines_in_values=True,
+        ),
+    )
+
+
 # Get match city from match JSON file
 def city(match_json: str | Path) -> str:
     with open(match_json) as fp:
@@ -20,11 +58,19 @@ def cities_gen(json_files: Iterable[Path]):
         yield city(json_file)
 
 
+# Teams sorted alphabetically, so that team_0 comes first.
+# Returns a new list, the match data is not modified.
+def sorted_teams(match_data: dict) -> list[str]:
+    return sorted(match_data["info"]["teams"])
+
+
 # Toss Result and Decision
 # winner = 1 if team_1 wins and 0 if team_0 wins
 # decision = 0 if bat first and 1 if field first.
-def toss(match_data: dict) -> tuple[int, int | None]:
-    winner = int(match_data["info"]["toss"]["winner"] == match_data["info"]["teams"][1])
+# teams (see sorted_teams) can be passed in when the caller has already sorted them.
+def toss(match_data: dict, teams: list[str] | None = None) -> tuple[int, int | None]:
+    teams = sorted_teams(match_data) if teams is None else teams
+    winner = int(match_data["info"]["toss"]["winner"] == teams[1])
     if match_data["info"]["toss"]["decision"] == "bat":
         decision = 0
     elif match_data["info"]["toss"]["decision"] == "field":
@@ -34,22 +80,37 @@ def toss(match_data: dict) -> tuple[int, int | None]:
     return winner, decision
 
 
-# Get score details for an over.
-def score_from_over(over: dict):
-    runs = 0
-    wickets = 0
-    deliveries = 0
-    extras = 0
-    for ball in over["deliveries"]:
-        runs += ball["runs"]["total"]
-        extras += ball["runs"]["extras"]
-        if "wickets" in ball.keys():
-            wickets += 1
-        deliveries += 1
-    return runs, wickets, extras, deliveries
+# Scorecard dict shared by scorecard_after_over and innings_scorecards.
+# An innings with no overs (e.g. overno <= 0) has a zero score.
+def _scorecard(
+    team: str,
+    *,
+    runs: int,
+    wickets: int,
+    extras: int,
+    overs_count: int,
+    last_over_deliveries: int,
+) -> dict:
+    if overs_count == 0:
+        return {
+            "team": team,
+            "runs": 0,
+            "wickets": 0,
+            "overs": (0, 0),
+            "extras": 0,
+        }
+    lastovdelv = divmod(last_over_deliveries, 6)
+    return {
+        "team": team,
+        "runs": runs,
+        "wickets": wickets,
+        "overs": (overs_count + lastovdelv[0] - 1, lastovdelv[1]),
+        "extras": extras,
+    }
 
 
 # Get Scores at the end of any over in an innings.
+# All deliveries up to the over are flattened and aggregated in a single pass.
 def scorecard_after_over(match_data: dict, innings_num: int = 1, overno: int = 50):
     if len(match_data["innings"]) >= innings_num:
         innings = match_data["innings"][innings_num - 1]
@@ -57,36 +118,102 @@ def scorecard_after_over(match_data: dict, innings_num: int = 1, overno: int = 5
         overs = [over for over in innings["overs"] if over["over"] < overno]
     else:
         raise KeyError(f"Innings not present: {innings_num}")
-    if overno > 0:
-        lastovdelv = divmod(score_from_over(overs[-1])[-1], 6)
-        score = {
-            "team": team,
-            "runs": sum(score_from_over(over)[0] for over in overs),
-            "wickets": sum(score_from_over(over)[1] for over in overs),
-            "overs": (len(overs) + lastovdelv[0] - 1, lastovdelv[1]),
-            "extras": sum(score_from_over(over)[2] for over in overs),
-        }
-    else:
-        score = {
-            "team": team,
-            "runs": 0,
-            "wickets": 0,
-            "overs": (0, 0),
-            "extras": 0,
-        }
-    return score
+    balls = [ball for over in overs for ball in over["deliveries"]]
+    return _scorecard(
+        team,
+        runs=sum(ball["runs"]["total"] for ball in balls),
+        wickets=sum("wickets" in ball for ball in balls),
+        extras=sum(ball["runs"]["extras"] for ball in balls),
+        overs_count=len(overs),
+        last_over_deliveries=len(overs[-1]["deliveries"]) if overs else 0,
+    )
+
+
+# Get Scores at the end of any over for every innings, from a match table returned
+# by read_match. Same scorecards as scorecard_after_over, aggregated with Arrow
+# compute on the flattened overs and deliveries instead of Python loops.
+def innings_scorecards(match_table: pa.Table, overno: int = 50) -> list[dict]:
+    innings = pc.list_flatten(match_table.column("innings").combine_chunks())
+    overs_list = pc.struct_field(innings, "overs")
+    overs = pc.list_flatten(overs_list)
+    # Innings number of each over
+    over_innings = pc.list_parent_indices(overs_list)
+    before_overno = pc.less(pc.struct_field(overs, "over"), overno)
+    overs = overs.filter(before_overno)
+    over_innings = over_innings.filter(before_overno)
+    deliveries_list = pc.struct_field(overs, "deliveries")
+    deliveries = pc.list_flatten(deliveries_list)
+    runs = pc.struct_field(deliveries, "runs")
+    ball_totals = (
+        pa.table(
+            {
+                # Innings number of each delivery
+                "innings": pc.take(
+                    over_innings, pc.list_parent_indices(deliveries_list)
+                ),
+                "runs": pc.struct_field(runs, "total"),
+                "wickets": pc.is_valid(pc.struct_field(deliveries, "wickets")).cast(
+                    pa.int64()
+                ),
+                "extras": pc.struct_field(runs, "extras"),
+            }
+        )
+        .group_by("innings")
+        .aggregate([("runs", "sum"), ("wickets", "sum"), ("extras", "sum")])
+    )
+    # Ordered aggregation, so use_threads=False to get the last over.
+    over_totals = (
+        pa.table(
+            {
+                "innings": over_innings,
+                "deliveries": pc.list_value_length(deliveries_list),
+            }
+        )
+        .group_by("innings", use_threads=False)
+        .aggregate([("deliveries", "count"), ("deliveries", "last")])
+    )
+    ball_totals = {row["innings"]: row for row in ball_totals.to_pylist()}
+    over_totals = {row["innings"]: row for row in over_totals.to_pylist()}
+    teams = pc.struct_field(innings, "team").to_pylist()
+
+    scorecards = []
+    for innings_num, team in enumerate(teams):
+        balls = ball_totals.get(innings_num, {})
+        overs_totals = over_totals.get(innings_num, {})
+        scorecards.append(
+            _scorecard(
+                team,
+                runs=balls.get("runs_sum", 0),
+                wickets=balls.get("wickets_sum", 0),
+                extras=balls.get("extras_sum", 0),
+                overs_count=overs_totals.get("deliveries_count", 0),
+                last_over_deliveries=overs_totals.get("deliveries_last", 0),
+            )
+        )
+    return scorecards
 
 
 # Get final scores for the match
-def get_scores(match_data):
-    w, d = toss(match_data)
+# toss_data and the innings scorecards can be passed in when the caller has already
+# computed them, for instance with innings_scorecards.
+def get_scores(
+    match_data,
+    toss_data: tuple[int, int | None] | None = None,
+    scorecards: list[dict] | None = None,
+):
+    w, d = toss(match_data) if toss_data is None else toss_data
     # We use exclusive or to find the batting first team.
     batfir = int((w or d) and (not w or not d))
     batsec = int(not batfir)
-    if len(match_data["innings"]) == 2:
+    if scorecards is None:
+        scorecards = [
+            scorecard_after_over(match_data, innings_num=innings_num)
+            for innings_num in range(1, len(match_data["innings"]) + 1)
+        ]
+    if len(scorecards) == 2:
         scores = {
-            batfir: scorecard_after_over(match_data, innings_num=1),
-            batsec: scorecard_after_over(match_data, innings_num=2),
+            batfir: scorecards[0],
+            batsec: scorecards[1],
         }
     else:
         raise ValueError("Match not completed")
@@ -94,11 +221,11 @@ def get_scores(match_data):
 
 
 # Match Result
-def results(match_data) -> int | None:
-    teams = match_data["info"]["teams"]
+# teams (see sorted_teams) can be passed in when the caller has already sorted them.
+def results(match_data, teams: list[str] | None = None) -> int | None:
+    teams = sorted_teams(match_data) if teams is None else teams
     outcome = match_data["info"]["outcome"]
-    teams.sort()
-    if "winner" in outcome.keys():
+    if outcome.get("winner") is not None:
         result = int(outcome["winner"] == teams[1])
         return result
     return None
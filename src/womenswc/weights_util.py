@@ -7,6 +7,20 @@ import pandas as pd
 import numpy as np
 
 
+# Base dataset columns used by the weighted stats
+BASE_COLUMNS = (
+    "team_0",
+    "team_1",
+    "runs_0",
+    "runs_1",
+    "wickets_0",
+    "wickets_1",
+    "deliveries_0",
+    "deliveries_1",
+    "result",
+)
+
+
 # Sorted list of unique teams
 def teams_list(base_df: pd.DataFrame) -> np.ndarray:
     teams = pd.unique(
@@ -16,106 +30,144 @@ def teams_list(base_df: pd.DataFrame) -> np.ndarray:
 
 
 # Exponential decay weights
-def expweights_list(base_df: pd.DataFrame, half_life=180) -> pd.Series:
+# Returns a contiguous float32 array, one weight per match.
+def expweights_list(base_df: pd.DataFrame, half_life=180) -> np.ndarray:
     k = 1 / half_life
-    date_min = base_df.start_date.min()
-    days = (base_df.start_date - date_min).dt.days
-    return pd.Series(
-        np.exp2(-k * days), index=base_df.index, name="exponential decay weight"
-    )
+    start_date = base_df.start_date.to_numpy().astype("datetime64[D]")
+    days = (start_date - start_date.min()).astype(np.int32)
+    return np.exp2(-k * days).astype(np.float32)
+
+
+# Columnar NumPy arrays of the base dataset, materialized once and passed to
+# the weighted stats functions instead of base_df.
+def base_arrays(base_df: pd.DataFrame) -> dict[str, np.ndarray]:
+    return {column: base_df[column].to_numpy() for column in BASE_COLUMNS}
 
 
 # Custom cumulative sum (Exclude current row)
-def custom_cumsum(x: pd.Series):
-    return x.cumsum() - x
+def custom_cumsum(x: pd.Series | np.ndarray, axis: int = 0):
+    return x.cumsum(axis=axis) - x
+
+
+# Get Indexer for NumPy broadcasting and advanced indexing.
+# Pairs each match (row) with the integer id of team_n (column).
+def indexer(arrays: dict[str, np.ndarray], teams: list[str], n: Literal[0, 1]):
+    return (
+        np.arange(len(arrays[f"team_{n}"])),
+        pd.Index(teams).get_indexer(arrays[f"team_{n}"]),
+    )
+
+
+# Scatter the values for team_0 and team_1 into an (..., N, T) array, where each
+# match row is non-zero only in the columns of the two teams that played it.
+# Leading axes of vals_0 and vals_1 (stacked stats) are kept.
+def _scatter_teams(
+    vals_0: np.ndarray,
+    vals_1: np.ndarray,
+    teams: list[str],
+    indexer_0: tuple[np.ndarray, np.ndarray],
+    indexer_1: tuple[np.ndarray, np.ndarray],
+) -> np.ndarray:
+    acc = np.zeros((*vals_0.shape, len(teams)), dtype=np.float32)
+    for vals, (rows, cols) in ((vals_0, indexer_0), (vals_1, indexer_1)):
+        # Teams not in teams have index -1, skip them.
+        known = cols >= 0
+        acc[..., rows[known], cols[known]] = vals[..., known]
+    return acc
 
 
 # Weighted cumulative sum team array(Exclude current row)
 def weighted_cumsum(
-    ser_0: pd.Series,
-    ser_1: pd.Series,
-    weight: pd.Series,
+    ser_0: pd.Series | np.ndarray,
+    ser_1: pd.Series | np.ndarray,
+    weight: np.ndarray,
     teams: list[str],
-    is_team_0: dict[str, pd.Series],
-    is_team_1: dict[str, pd.Series],
+    indexer_0: tuple[np.ndarray, np.ndarray],
+    indexer_1: tuple[np.ndarray, np.ndarray],
 ) -> np.ndarray:
     """
     Calculate weighted cumulative sums for numeric features.
 
     Parameters
     ----------
-    ser_0 : pd.Series
+    ser_0 : pd.Series | np.ndarray
         The base_dataset column with values for team_0. For instance, base_df.runs_0.
-    ser_1 : pd.Series
+        A (K, N) array of K stacked columns can be passed to compute K weighted
+        cumulative sums in one pass.
+    ser_1 : pd.Series | np.ndarray
         The base_dataset  column with values for team_1. It must be of the same
         kind.
         For instance, if ser_0 = base_df.runs_0, then ser_1 must be base_df.runs_1.
-    weight : pd.Series
-        A pandas series containing weights.
-    is_team_0 : dict[str, pd.Series]
-        A dictionary containing all characteristic function values for each team over
-        column team_0. For each team, is_team_0 is a boolean series, which is True for
-        matches when the team played as team_0.
-        For example: ``is_team["India"] = (base_df.team_0 == "India")``
-     is_team_1 : dict[str, pd.Series]
-        Exactly like is_team_0 except it's for team_1.
-
-    Note: All four must have the same index.
+    weight : np.ndarray
+        A numpy array containing weights. See ``expweights_list``.
+    teams : list[str]
+        Sorted list of distinct teams.
+    indexer_0 : tuple[np.ndarray, np.ndarray]
+        Match and team indices for team_0, as returned by ``indexer``.
+    indexer_1 : tuple[np.ndarray, np.ndarray]
+        Exactly like indexer_0 except it's for team_1.
+
+    Note: ser_0, ser_1 and weight must have the same length N. Series are
+    converted to arrays, so their index is ignored.
 
     Returns
     -------
     np.ndarray
         A numpy array containing weighted cumulative sums for the feature for each team.
         Rows are matches, and columns are distinct teams (sorted).
+        For (K, N) inputs, a (K, N, T) array with one such array per column.
     """
-    ser = {team: ser_0 * is_team_0[team] + ser_1 * is_team_1[team] for team in teams}
+    # Unwrap to float32 arrays, so no pandas index alignment happens below.
+    weight = np.asarray(weight, dtype=np.float32)
+    vals_0 = np.asarray(ser_0, dtype=np.float32)
+    vals_1 = np.asarray(ser_1, dtype=np.float32)
+    scaled = _scatter_teams(
+        vals_0 / weight, vals_1 / weight, teams, indexer_0, indexer_1
+    )
+    return _wcumsum(scaled, weight)
 
-    wt_cumsum = np.array(
-        [weight * custom_cumsum(ser[team] / weight) for team in teams]
-    ).transpose()
-    return wt_cumsum
 
+# Weighted cumulative sum kernel on raw float32 arrays (Exclude current row)
+# scaled is an (..., N, T) array of team values divided by weight, and weight an
+# (N,) array. Returns an (..., N, T) array.
+def _wcumsum(scaled: np.ndarray, weight: np.ndarray) -> np.ndarray:
+    return weight[:, None] * custom_cumsum(scaled, axis=-2)
 
-# Get Indexer for NumPy broadcasting and advanced indexing.
-def indexer(base_df: pd.DataFrame, teams: list[str], n: Literal[0, 1]):
-    return (np.arange(len(base_df)), pd.Index(teams).get_indexer(base_df[f"team_{n}"]))
 
-
-# Weighted Cumulative Sum for any numeric column
-def weighted_cumsum_column(
-    base_df: pd.DataFrame,
-    column: str,
-    weight: pd.Series,
+# Weighted match count team array (Exclude current row)
+# Specialization of weighted_cumsum for all-ones values, where 1 / weight is
+# scattered directly for the teams that played each match.
+def _weighted_match_count(
+    weight: np.ndarray,
     teams: list[str],
-    is_team_0: dict[str, pd.Series],
-    is_team_1: dict[str, pd.Series],
-    is_bowling_side: bool = True,
-    n: Literal[0, 1] = 0,  # 0 for team_0 and 1 for team_1
+    indexer_0: tuple[np.ndarray, np.ndarray],
+    indexer_1: tuple[np.ndarray, np.ndarray],
 ) -> np.ndarray:
+    weight = np.asarray(weight, dtype=np.float32)
+    inv_weight = 1 / weight
+    return _wcumsum(
+        _scatter_teams(inv_weight, inv_weight, teams, indexer_0, indexer_1), weight
+    )
+
+
+# Values for team_0 and team_1 to sum for a numeric column
+def side_columns(
+    arrays: dict[str, np.ndarray], column: str, is_bowling_side: bool = True
+) -> tuple[np.ndarray, np.ndarray]:
     m = int(is_bowling_side)
     # For bowling side stats, 0 and 1 are switched.
     # For example, if column = 'runs', then if,
     # 1. is_bowling_side == True, the weighted cumsum is for runs conceded.
     # 2. is_bowling_side == False, the weighted cumsum is for runs scored.
-    if n in [0, 1]:
-        return weighted_cumsum(
-            base_df[f"{column}_{m}"],
-            base_df[f"{column}_{1 - m}"],
-            weight,
-            teams,
-            is_team_0,
-            is_team_1,
-        )[indexer(base_df, teams, n)]
-    else:
-        raise ValueError("'n' must either be 0 or 1")
+    return arrays[f"{column}_{m}"], arrays[f"{column}_{1 - m}"]
 
 
 def weighted_agg_stats(
-    base_df: pd.DataFrame,
-    weight: pd.Series,
+    arrays: dict[str, np.ndarray],
+    weight: np.ndarray,
     teams: list[str],
-    is_team_0: dict[str, pd.Series],
-    is_team_1: dict[str, pd.Series],
+    indexer_0: tuple[np.ndarray, np.ndarray],
+    indexer_1: tuple[np.ndarray, np.ndarray],
 ) -> dict[str, np.ndarray]:
     weighted_stats = {}
     batting_side_dict = {
@@ -129,76 +181,59 @@ def weighted_agg_stats(
         "deliveries": "deliveries_bowled",
     }
 
+    # Values for team_0 and team_1 of every stat.
+    sides = {}
     # Weighted Cumulative Runs Scored, Wickets Lost, Deliveries Played
-    for n in [0, 1]:
-        for column, stat in batting_side_dict.items():
-            weighted_stats[f"{stat}_{n}"] = weighted_cumsum_column(
-                base_df,
-                column,
-                weight,
-                teams,
-                is_team_0,
-                is_team_1,
-                is_bowling_side=False,
-                n=n,
-            )
-        # Weighted Cumulative Runs Conceded, Wickets Taken, Deliveries bowled
-        for column, stat in bowling_side_dict.items():
-            weighted_stats[f"{stat}_{n}"] = weighted_cumsum_column(
-                base_df,
-                column,
+    for column, stat in batting_side_dict.items():
+        sides[stat] = side_columns(arrays, column, is_bowling_side=False)
+    # Weighted Cumulative Runs Conceded, Wickets Taken, Deliveries bowled
+    for column, stat in bowling_side_dict.items():
+        sides[stat] = side_columns(arrays, column, is_bowling_side=True)
+    # Weighted Win Count
+    sides["wins"] = (
+        arrays["result"] == 0,  # when summed, you get win count
+        arrays["result"] == 1,
+    )
+
+    # The stats are stacked into (K, N) arrays and summed together in one pass.
+    # The team arrays do not depend on n, only the indexer does.
+    # So each one is computed once and then indexed for both team_0 and team_1.
+    team_arrays = dict(
+        zip(
+            sides,
+            weighted_cumsum(
+                np.stack([vals_0 for vals_0, _ in sides.values()]),
+                np.stack([vals_1 for _, vals_1 in sides.values()]),
                 weight,
                 teams,
-                is_team_0,
-                is_team_1,
-                is_bowling_side=True,
-                n=n,
-            )
-        # Weighted Win Count
-        weighted_stats[f"wins_{n}"] = weighted_cumsum(
-            base_df.result == 0,  # when summed, you get win count
-            base_df.result == 1,
-            weight,
-            teams,
-            is_team_0,
-            is_team_1,
-        )[indexer(base_df, teams, n)]
-        # Weighted Match Count
-        weighted_stats[f"matches_{n}"] = weighted_cumsum(
-            np.ones(
-                shape=len(base_df),
-            ),  # when summed, you get match count
-            np.ones(
-                shape=len(base_df),
+                indexer_0,
+                indexer_1,
             ),
-            weight,
-            teams,
-            is_team_0,
-            is_team_1,
-        )[indexer(base_df, teams, n)]
+        )
+    )
+    # Weighted Match Count
+    team_arrays["matches"] = _weighted_match_count(weight, teams, indexer_0, indexer_1)
+
+    for n, team_n_indexer in enumerate([indexer_0, indexer_1]):
+        for stat, team_array in team_arrays.items():
+            weighted_stats[f"{stat}_{n}"] = team_array[team_n_indexer]
 
     return weighted_stats
 
 
-def drop_zeros_in_denominator(
-    base_df: pd.DataFrame,
-    weight: pd.Series,
-    teams: list[str],
-    is_team_0: dict[str, pd.Series],
-    is_team_1: dict[str, pd.Series],
-):
-    # Initialize filtering condition
-    condition = [False] * len(base_df)
-    for n in [0, 1]:
-        weighted_stats = weighted_agg_stats(
-            base_df, weight, teams, is_team_0, is_team_1
-        )
-        a = weighted_stats[f"wickets_lost_{n}"]  # Wickets Lost
-        b = weighted_stats[f"deliveries_played_{n}"]  # Deliveries Played
-        # Wickets Taken (Switch 0 and 1)
-        c = weighted_stats[f"wickets_taken_{n}"]
-        # Deliveries Bowled (Switch 0 and 1)
-        d = weighted_stats[f"deliveries_bowled_{n}"]
-        e = weighted_stats[f"matches_{n}"]  # Matches Played
-        condition = condition | (a == 0) | (b == 0) | (c == 0) | (d == 0) | (e == 0)
-    return ~condition
+# Takes the output of weighted_agg_stats, so the stats are not recomputed.
+def drop_zeros_in_denominator(weighted_stats: dict[str, np.ndarray]) -> np.ndarray:
+    denominators = np.stack(
+        [
+            weighted_stats[f"{stat}_{n}"]
+            for n in [0, 1]
+            for stat in [
+                "wickets_lost",
+                "deliveries_played",
+                "wickets_taken",
+                "deliveries_bowled",
+                "matches",
+            ]
+        ]
+    )
+    return ~np.any(denominators == 0, axis=0)